@@ -1,33 +1,175 @@
 #!/usr/bin/env python3
+import base64
+import gzip
+import hashlib
+import http.client
 import json
 import os
+import queue
+import re
+import signal
+import socket
 import sqlite3
-import urllib.error
+import ssl
+import sys
+import threading
+import time
+import traceback
 import urllib.request
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
 from datetime import datetime, timezone
+from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from urllib.parse import urlparse
+from typing import NamedTuple
+from urllib.parse import unquote, urlparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
 
 ROOT = Path(__file__).resolve().parent
 DB_PATH = ROOT / "chatbot.db"
 HOST = "0.0.0.0"
 PORT = int(os.environ.get("PORT", "8000"))
+WORKER_THREADS = int(os.environ.get("WORKER_THREADS", "32"))
+CHAT_WORKERS = int(os.environ.get("CHAT_WORKERS", str(max(1, WORKER_THREADS // 2))))
+REQUEST_TIMEOUT = 10
+WORKER_PROCESSES = int(os.environ.get("WORKER_PROCESSES", "1"))
+# Every worker thread plus the background message writer may hold a connection at once.
+DB_POOL_SIZE = WORKER_THREADS + 1
+LLM_POOL_SIZE = 10
+MESSAGE_FLUSH_INTERVAL = 0.25
+MESSAGE_FLUSH_BATCH = 50
+CONTENT_COMPRESS_MIN = 1024
+CONTENT_COMPRESS_LEVEL = 6
+STATIC_CACHE_SIZE = 64
+STATIC_CACHE_MAX_FILE = 1024 * 1024
+STATIC_CACHE_RECHECK = 2.0
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 1
+MIME_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+}
+API_ROUTES = {
+    "/api/conversations": "conversations",
+    "/api/chat": "chat",
+}
+STATUS_LINES = {
+    status.value: f"{BaseHTTPRequestHandler.protocol_version} {status.value} {status.phrase}\r\n".encode("latin-1")
+    for status in HTTPStatus
+}
+CONVERSATION_ROUTE = re.compile(r"/api/conversations/([0-9]+)(/messages)?")
+LLM_TIMEOUT = 60
+
+
+if orjson is not None:
+
+    def json_dumps(payload) -> bytes:
+        try:
+            return orjson.dumps(payload)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, which the stdlib encoder handles.
+            return json.dumps(payload).encode("utf-8")
+
+    json_loads = orjson.loads
+else:
+
+    def json_dumps(payload) -> bytes:
+        return json.dumps(payload).encode("utf-8")
+
+    json_loads = json.loads
+
+
+# simdjson parsers are not thread-safe and invalidate the previous document on
+# each parse, so every handler thread gets its own and results are materialized.
+_simdjson_local = threading.local()
+
+
+def _simdjson_loads(raw: bytes):
+    parser = getattr(_simdjson_local, "parser", None)
+    if parser is None:
+        parser = _simdjson_local.parser = simdjson.Parser()
+
+    try:
+        document = parser.parse(raw)
+    except RuntimeError:
+        # simdjson rejects valid documents it cannot represent, such as integers wider
+        # than 64 bits; the stdlib parser keeps them exact.
+        return json.loads(raw)
+    if isinstance(document, simdjson.Object):
+        return document.as_dict()
+    if isinstance(document, simdjson.Array):
+        return document.as_list()
+    return document
+
+
+if simdjson is not None:
+    json_loads = _simdjson_loads
 
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def get_db() -> sqlite3.Connection:
-    connection = sqlite3.connect(DB_PATH)
+_db_pool: queue.Queue = queue.Queue(maxsize=DB_POOL_SIZE)
+
+# Appended messages are queued and written in batches by a background thread;
+# reads that must see them call flush_messages() first.
+_batch_message_writes = True
+_pending_messages: deque = deque()
+_pending_messages_lock = threading.Lock()
+_message_flush_lock = threading.Lock()
+_message_flush_wakeup = threading.Event()
+
+
+def connect_db() -> sqlite3.Connection:
+    # Autocommit mode: multi-statement writes open their own transaction with BEGIN.
+    connection = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
     connection.row_factory = sqlite3.Row
     connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.execute("PRAGMA cache_size = -20000")
+    connection.execute("PRAGMA temp_store = MEMORY")
+    connection.execute("PRAGMA mmap_size = 268435456")
     return connection
 
 
+@contextmanager
+def get_db():
+    try:
+        connection = _db_pool.get_nowait()
+    except queue.Empty:
+        connection = connect_db()
+
+    try:
+        yield connection
+        if connection.in_transaction:
+            connection.commit()
+    except BaseException:
+        if connection.in_transaction:
+            connection.rollback()
+        raise
+    finally:
+        try:
+            _db_pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+
 def init_db() -> None:
-    with get_db() as db:
+    with closing(connect_db()) as db:
         db.executescript(
             """
             CREATE TABLE IF NOT EXISTS conversations (
@@ -35,7 +177,8 @@ def init_db() -> None:
               title TEXT NOT NULL,
               system_prompt TEXT NOT NULL DEFAULT '',
               created_at TEXT NOT NULL,
-              updated_at TEXT NOT NULL
+              updated_at TEXT NOT NULL,
+              message_count INTEGER NOT NULL DEFAULT 0
             );
 
             CREATE TABLE IF NOT EXISTS messages (
@@ -43,33 +186,94 @@ def init_db() -> None:
               conversation_id INTEGER NOT NULL,
               role TEXT NOT NULL CHECK (role IN ('user', 'assistant', 'system')),
               content TEXT NOT NULL,
+              content_blob BLOB,
               created_at TEXT NOT NULL,
               FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
             );
+
+            CREATE INDEX IF NOT EXISTS idx_messages_conv_id ON messages(conversation_id, id);
             """
         )
 
+        columns = {row[1] for row in db.execute("PRAGMA table_info(conversations)")}
+        if "message_count" not in columns:
+            db.executescript(
+                """
+                ALTER TABLE conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0;
+                UPDATE conversations
+                SET message_count = (SELECT COUNT(*) FROM messages WHERE messages.conversation_id = conversations.id);
+                """
+            )
+
+        columns = {row[1] for row in db.execute("PRAGMA table_info(messages)")}
+        if "content_blob" not in columns:
+            db.execute("ALTER TABLE messages ADD COLUMN content_blob BLOB")
+
+        db.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_messages_count_insert AFTER INSERT ON messages
+            BEGIN
+              UPDATE conversations SET message_count = message_count + 1 WHERE id = NEW.conversation_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_messages_count_delete AFTER DELETE ON messages
+            BEGIN
+              UPDATE conversations SET message_count = message_count - 1 WHERE id = OLD.conversation_id;
+            END;
+            """
+        )
+        db.execute("PRAGMA journal_mode = WAL")
+
+
+def message_content(value) -> str | None:
+    # Numbers were always stored as their text form; anything else non-string is rejected
+    # before it can reach compression or the batched write queue.
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return None
+
+
+def compress_content(content: str) -> tuple[str, bytes | None]:
+    # Long messages are stored zlib-compressed in content_blob with an empty content column.
+    data = content.encode("utf-8")
+    if len(data) < CONTENT_COMPRESS_MIN:
+        return content, None
+
+    blob = zlib.compress(data, CONTENT_COMPRESS_LEVEL)
+    if len(blob) >= len(data):
+        return content, None
+    return "", blob
+
+
+def decompress_content(content: str, blob: bytes | None) -> str:
+    if blob is None:
+        return content
+    return zlib.decompress(blob).decode("utf-8")
+
 
-def create_conversation(title: str = "New conversation", system_prompt: str = "") -> int:
+def create_conversation(title: str = "New conversation", system_prompt: str = ""):
     timestamp = now_iso()
     with get_db() as db:
-        cursor = db.execute(
-            "INSERT INTO conversations (title, system_prompt, created_at, updated_at) VALUES (?, ?, ?, ?)",
+        row = db.execute(
+            """
+            INSERT INTO conversations (title, system_prompt, created_at, updated_at) VALUES (?, ?, ?, ?)
+            RETURNING id, title, system_prompt, created_at, updated_at
+            """,
             (title, system_prompt, timestamp, timestamp),
-        )
-        return int(cursor.lastrowid)
+        ).fetchone()
+        return dict(row)
 
 
 def list_conversations():
+    flush_messages()
     with get_db() as db:
         rows = db.execute(
             """
-            SELECT c.id, c.title, c.system_prompt, c.created_at, c.updated_at,
-                   COUNT(m.id) AS message_count
-            FROM conversations c
-            LEFT JOIN messages m ON m.conversation_id = c.id
-            GROUP BY c.id
-            ORDER BY c.updated_at DESC
+            SELECT id, title, system_prompt, created_at, updated_at, message_count
+            FROM conversations
+            ORDER BY updated_at DESC
             """
         ).fetchall()
         return [dict(row) for row in rows]
@@ -85,12 +289,21 @@ def get_conversation(conversation_id: int):
 
 
 def list_messages(conversation_id: int):
+    flush_messages()
     with get_db() as db:
         rows = db.execute(
-            "SELECT id, role, content, created_at FROM messages WHERE conversation_id = ? ORDER BY id ASC",
+            "SELECT id, role, content, content_blob, created_at FROM messages WHERE conversation_id = ? ORDER BY id ASC",
             (conversation_id,),
         ).fetchall()
-        return [dict(row) for row in rows]
+        return [
+            {
+                "id": row["id"],
+                "role": row["role"],
+                "content": decompress_content(row["content"], row["content_blob"]),
+                "created_at": row["created_at"],
+            }
+            for row in rows
+        ]
 
 
 def update_conversation(conversation_id: int, title: str | None, system_prompt: str | None):
@@ -110,27 +323,201 @@ def update_conversation(conversation_id: int, title: str | None, system_prompt:
     params.append(conversation_id)
 
     with get_db() as db:
-        db.execute(f"UPDATE conversations SET {', '.join(updates)} WHERE id = ?", params)
+        row = db.execute(
+            f"""
+            UPDATE conversations SET {', '.join(updates)} WHERE id = ?
+            RETURNING id, title, system_prompt, created_at, updated_at
+            """,
+            params,
+        ).fetchone()
+        return dict(row) if row else None
 
 
 def append_message(conversation_id: int, role: str, content: str):
+    row = (conversation_id, role, *compress_content(content), now_iso())
+    if not _batch_message_writes:
+        _write_messages([row])
+        return
+
+    with _pending_messages_lock:
+        _pending_messages.append(row)
+        pending = len(_pending_messages)
+    if pending >= MESSAGE_FLUSH_BATCH:
+        _message_flush_wakeup.set()
+
+
+def flush_messages() -> None:
+    with _message_flush_lock:
+        # Rows stay queued until the write has committed, so a failed flush is retried
+        # later instead of losing messages that were already acknowledged.
+        with _pending_messages_lock:
+            rows = list(_pending_messages)
+        if not rows:
+            return
+
+        _write_messages(rows)
+        with _pending_messages_lock:
+            for _ in rows:
+                _pending_messages.popleft()
+
+
+def _write_messages(rows) -> None:
+    latest = {}
+    for conversation_id, *_, timestamp in rows:
+        latest[conversation_id] = max(timestamp, latest.get(conversation_id, timestamp))
+
     with get_db() as db:
-        db.execute(
-            "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)",
-            (conversation_id, role, content, now_iso()),
+        db.execute("BEGIN")
+        db.executemany(
+            "INSERT INTO messages (conversation_id, role, content, content_blob, created_at) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        db.executemany(
+            "UPDATE conversations SET updated_at = MAX(updated_at, ?) WHERE id = ?",
+            [(timestamp, conversation_id) for conversation_id, timestamp in latest.items()],
         )
-        db.execute("UPDATE conversations SET updated_at = ? WHERE id = ?", (now_iso(), conversation_id))
+
+
+def _message_writer() -> None:
+    while True:
+        _message_flush_wakeup.wait(MESSAGE_FLUSH_INTERVAL)
+        _message_flush_wakeup.clear()
+        try:
+            flush_messages()
+        except sqlite3.Error as err:
+            print(f"Failed to write queued messages, will retry: {err}", file=sys.stderr)
+
+
+def start_message_writer() -> None:
+    threading.Thread(target=_message_writer, name="message-writer", daemon=True).start()
 
 
 def replace_messages(conversation_id: int, messages):
+    flush_messages()
+    timestamp = now_iso()
     with get_db() as db:
+        db.execute("BEGIN")
         db.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
-        for message in messages:
-            db.execute(
-                "INSERT INTO messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)",
-                (conversation_id, message["role"], message["content"], now_iso()),
-            )
-        db.execute("UPDATE conversations SET updated_at = ? WHERE id = ?", (now_iso(), conversation_id))
+        db.executemany(
+            "INSERT INTO messages (conversation_id, role, content, content_blob, created_at) VALUES (?, ?, ?, ?, ?)",
+            [
+                (conversation_id, message["role"], *compress_content(message["content"]), timestamp)
+                for message in messages
+            ],
+        )
+        db.execute("UPDATE conversations SET updated_at = ? WHERE id = ?", (timestamp, conversation_id))
+
+
+# Built once: creating a context loads and parses the system CA bundle.
+_llm_ssl_context = ssl.create_default_context()
+_llm_pools: dict[tuple[str, str, str | None], queue.Queue] = {}
+_llm_pools_lock = threading.Lock()
+
+
+def _llm_pool(scheme: str, netloc: str, proxy: str | None) -> queue.Queue:
+    with _llm_pools_lock:
+        pool = _llm_pools.get((scheme, netloc, proxy))
+        if pool is None:
+            pool = _llm_pools[(scheme, netloc, proxy)] = queue.Queue(maxsize=LLM_POOL_SIZE)
+        return pool
+
+
+def _llm_proxy(scheme: str, hostname: str | None) -> str | None:
+    # Same HTTP(S)_PROXY / NO_PROXY handling urllib.request.urlopen applies.
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or (hostname and urllib.request.proxy_bypass(hostname)):
+        return None
+    return proxy if "://" in proxy else f"http://{proxy}"
+
+
+def _proxy_headers(proxy_url) -> dict:
+    if proxy_url.username is None:
+        return {}
+    credentials = f"{unquote(proxy_url.username)}:{unquote(proxy_url.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")}
+
+
+def _open_llm_connection(scheme: str, netloc: str, proxy: str | None) -> http.client.HTTPConnection:
+    if scheme not in ("http", "https"):
+        raise RuntimeError(f"Unsupported LLM_API_URL scheme: {scheme}")
+
+    host = netloc
+    if proxy is not None:
+        proxy_url = urlparse(proxy)
+        host = proxy_url.hostname
+        if proxy_url.port:
+            host = f"{host}:{proxy_url.port}"
+
+    if scheme == "http":
+        return http.client.HTTPConnection(host, timeout=LLM_TIMEOUT)
+
+    connection = http.client.HTTPSConnection(host, timeout=LLM_TIMEOUT, context=_llm_ssl_context)
+    if proxy is not None:
+        connection.set_tunnel(netloc, headers=_proxy_headers(proxy_url))
+    return connection
+
+
+def llm_post(api_url: str, body: bytes, headers: dict) -> tuple[int, bytes]:
+    parsed = urlparse(api_url)
+    target = parsed.path or "/"
+    if parsed.query:
+        target = f"{target}?{parsed.query}"
+
+    proxy = _llm_proxy(parsed.scheme, parsed.hostname)
+    if proxy is not None and parsed.scheme == "http":
+        # Plain HTTP goes through the proxy with an absolute-form target instead of a tunnel.
+        target = api_url
+        headers = {**headers, **_proxy_headers(urlparse(proxy))}
+
+    pool = _llm_pool(parsed.scheme, parsed.netloc, proxy)
+    while True:
+        try:
+            connection = pool.get_nowait()
+            reused = True
+        except queue.Empty:
+            connection = _open_llm_connection(parsed.scheme, parsed.netloc, proxy)
+            reused = False
+
+        # A pooled keep-alive connection may have been dropped by the server while idle.
+        # Only replay the POST when the upstream cannot have seen it: the send failed, or
+        # the connection closed before any response byte arrived.
+        try:
+            connection.request("POST", target, body=body, headers=headers)
+        except (ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if reused:
+                continue
+            raise
+        except BaseException:
+            connection.close()
+            raise
+
+        try:
+            response = connection.getresponse()
+        except http.client.RemoteDisconnected:
+            connection.close()
+            if reused:
+                continue
+            raise
+        except BaseException:
+            connection.close()
+            raise
+
+        try:
+            raw = response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            try:
+                pool.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+
+        return response.status, raw
 
 
 def llm_chat(messages):
@@ -147,24 +534,21 @@ def llm_chat(messages):
         return f"[mock backend reply] Set LLM_API_KEY to call a real model. Last user message: {last_user}"
 
     payload = {"model": model, "messages": messages}
-    request = urllib.request.Request(
-        api_url,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-        },
-        method="POST",
-    )
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+    }
 
     try:
-        with urllib.request.urlopen(request, timeout=60) as response:
-            data = json.loads(response.read().decode("utf-8"))
-    except urllib.error.HTTPError as err:
-        detail = err.read().decode("utf-8", errors="ignore")
-        raise RuntimeError(f"LLM request failed ({err.code}): {detail}") from err
-    except urllib.error.URLError as err:
-        raise RuntimeError(f"LLM connection failed: {err.reason}") from err
+        status, raw = llm_post(api_url, json_dumps(payload), headers)
+    except (OSError, http.client.HTTPException) as err:
+        raise RuntimeError(f"LLM connection failed: {err}") from err
+
+    if status >= 400:
+        detail = raw.decode("utf-8", errors="ignore")
+        raise RuntimeError(f"LLM request failed ({status}): {detail}")
+
+    data = json_loads(raw)
 
     choices = data.get("choices") or []
     if not choices:
@@ -177,158 +561,375 @@ def llm_chat(messages):
     return content
 
 
+def match_route(path: str) -> tuple[str | None, int | None]:
+    kind = API_ROUTES.get(path)
+    if kind is not None:
+        return kind, None
+
+    match = CONVERSATION_ROUTE.fullmatch(path)
+    if match is None:
+        return None, None
+
+    return ("messages" if match.group(2) else "conversation"), int(match.group(1))
+
+
+# Caps how many workers may sit in slow LLM calls so DB and static routes stay served.
+_chat_slots = threading.BoundedSemaphore(CHAT_WORKERS)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() != "gzip":
+            continue
+
+        _, _, quality = params.partition("q=")
+        try:
+            return not quality or float(quality) > 0
+        except ValueError:
+            return False
+    return False
+
+
+class StaticEntry(NamedTuple):
+    content: bytes
+    mime: str
+    etag: str
+    file_path: Path
+    mtime_ns: int
+    checked_at: float
+
+
+_static_cache: OrderedDict[str, StaticEntry] = OrderedDict()
+_static_cache_lock = threading.Lock()
+
+
+def static_cache_get(route_path: str) -> StaticEntry | None:
+    with _static_cache_lock:
+        entry = _static_cache.get(route_path)
+        if entry is None:
+            return None
+        _static_cache.move_to_end(route_path)
+
+    now = time.monotonic()
+    if now - entry.checked_at < STATIC_CACHE_RECHECK:
+        return entry
+
+    try:
+        mtime_ns = entry.file_path.stat().st_mtime_ns
+    except OSError:
+        mtime_ns = None
+
+    with _static_cache_lock:
+        if mtime_ns != entry.mtime_ns:
+            _static_cache.pop(route_path, None)
+            return None
+        entry = _static_cache[route_path] = entry._replace(checked_at=now)
+        return entry
+
+
+def static_cache_put(route_path: str, file_path: Path, mime: str) -> StaticEntry:
+    mtime_ns = file_path.stat().st_mtime_ns
+    content = file_path.read_bytes()
+    etag = f'"{hashlib.sha1(content).hexdigest()}"'
+    entry = StaticEntry(content, mime, etag, file_path, mtime_ns, time.monotonic())
+
+    with _static_cache_lock:
+        _static_cache[route_path] = entry
+        _static_cache.move_to_end(route_path)
+        while len(_static_cache) > STATIC_CACHE_SIZE:
+            _static_cache.popitem(last=False)
+    return entry
+
+
 class Handler(BaseHTTPRequestHandler):
+    # Idle or stalled clients give their worker thread back after this many seconds.
+    timeout = REQUEST_TIMEOUT
+
+    def setup(self):
+        super().setup()
+        # Small JSON replies should not wait on Nagle's algorithm.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
     def _json_response(self, payload, status=200):
-        body = json.dumps(payload).encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        body = json_dumps(payload)
+        headers = b"Content-Type: application/json; charset=utf-8\r\n"
+        if len(body) > GZIP_MIN_SIZE:
+            headers += b"Vary: Accept-Encoding\r\n"
+            if accepts_gzip(self.headers.get("Accept-Encoding", "")):
+                body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+                headers += b"Content-Encoding: gzip\r\n"
+
+        self.log_request(status)
+        # Status line, headers and body go out in a single write.
+        self.wfile.write(
+            STATUS_LINES[status]
+            + headers
+            + b"Content-Length: "
+            + str(len(body)).encode("ascii")
+            + b"\r\n\r\n"
+            + body
+        )
 
     def _read_json(self):
         content_length = int(self.headers.get("Content-Length", "0"))
         raw = self.rfile.read(content_length) if content_length else b"{}"
-        return json.loads(raw.decode("utf-8"))
+        return json_loads(raw)
 
     def _serve_static(self, route_path: str):
-        relative = "index.html" if route_path in ("", "/") else route_path.lstrip("/")
-        file_path = (ROOT / relative).resolve()
+        entry = static_cache_get(route_path)
+        if entry is None:
+            relative = "index.html" if route_path in ("", "/") else route_path.lstrip("/")
+            file_path = (ROOT / relative).resolve()
 
-        if ROOT not in file_path.parents and file_path != ROOT:
-            self.send_error(403, "Forbidden")
-            return
+            if ROOT not in file_path.parents and file_path != ROOT:
+                self.send_error(403, "Forbidden")
+                return
 
-        if not file_path.exists() or file_path.is_dir():
-            self.send_error(404, "Not found")
-            return
+            if not file_path.exists() or file_path.is_dir():
+                self.send_error(404, "Not found")
+                return
 
-        mime = "text/plain; charset=utf-8"
-        if file_path.suffix == ".html":
-            mime = "text/html; charset=utf-8"
-        elif file_path.suffix == ".css":
-            mime = "text/css; charset=utf-8"
-        elif file_path.suffix == ".js":
-            mime = "application/javascript; charset=utf-8"
+            mime = MIME_TYPES.get(file_path.suffix, "text/plain; charset=utf-8")
 
-        content = file_path.read_bytes()
-        self.send_response(200)
-        self.send_header("Content-Type", mime)
-        self.send_header("Content-Length", str(len(content)))
-        self.end_headers()
-        self.wfile.write(content)
+            if file_path.stat().st_size > STATIC_CACHE_MAX_FILE:
+                return self._send_static_file(file_path, mime)
 
-    def do_GET(self):
-        parsed = urlparse(self.path)
-        path = parsed.path
+            entry = static_cache_put(route_path, file_path, mime)
 
-        if path == "/api/conversations":
-            return self._json_response({"conversations": list_conversations()})
+        if self.headers.get("If-None-Match") == entry.etag:
+            self.send_response(304)
+            self.send_header("ETag", entry.etag)
+            self.end_headers()
+            return
 
-        if path.startswith("/api/conversations/") and path.endswith("/messages"):
+        self.send_response(200)
+        self.send_header("Content-Type", entry.mime)
+        self.send_header("Content-Length", str(len(entry.content)))
+        self.send_header("ETag", entry.etag)
+        self.end_headers()
+        self.wfile.write(entry.content)
+
+    def _send_static_file(self, file_path: Path, mime: str):
+        with file_path.open("rb") as file:
+            file_size = os.fstat(file.fileno()).st_size
+            self.send_response(200)
+            self.send_header("Content-Type", mime)
+            self.send_header("Content-Length", str(file_size))
+            self.end_headers()
+            # socket.sendfile uses os.sendfile where available and falls back to send() otherwise.
+            self.connection.sendfile(file, 0, file_size)
+
+    def _list_conversations(self, conversation_id=None):
+        return self._json_response({"conversations": list_conversations()})
+
+    def _create_conversation(self, conversation_id=None):
+        body = self._read_json()
+        title = body.get("title") or "New conversation"
+        system_prompt = body.get("systemPrompt") or ""
+        conversation = create_conversation(title=title, system_prompt=system_prompt)
+        return self._json_response({"conversation": conversation}, status=201)
+
+    def _update_conversation(self, conversation_id):
+        body = self._read_json()
+        conversation = update_conversation(conversation_id, body.get("title"), body.get("systemPrompt"))
+        if not conversation:
+            return self._json_response({"error": "conversation not found"}, status=404)
+
+        return self._json_response({"conversation": conversation})
+
+    def _list_messages(self, conversation_id):
+        if not get_conversation(conversation_id):
+            return self._json_response({"error": "conversation not found"}, status=404)
+
+        return self._json_response({"messages": list_messages(conversation_id)})
+
+    def _append_message(self, conversation_id):
+        if not get_conversation(conversation_id):
+            return self._json_response({"error": "conversation not found"}, status=404)
+
+        body = self._read_json()
+        role = body.get("role")
+        content = message_content(body.get("content", ""))
+        if role not in {"user", "assistant", "system"}:
+            return self._json_response({"error": "invalid role"}, status=400)
+        if content is None:
+            return self._json_response({"error": "content must be a string"}, status=400)
+
+        append_message(conversation_id, role, content)
+        return self._json_response({"ok": True}, status=202)
+
+    def _replace_messages(self, conversation_id):
+        if not get_conversation(conversation_id):
+            return self._json_response({"error": "conversation not found"}, status=404)
+
+        body = self._read_json()
+        messages = body.get("messages", [])
+        if not isinstance(messages, list):
+            return self._json_response({"error": "messages must be an array"}, status=400)
+
+        cleaned = []
+        for message in messages:
+            role = message.get("role")
+            content = message_content(message.get("content", ""))
+            if role not in {"user", "assistant", "system"}:
+                return self._json_response({"error": "invalid role in messages"}, status=400)
+            if content is None:
+                return self._json_response({"error": "invalid content in messages"}, status=400)
+            cleaned.append({"role": role, "content": content})
+
+        replace_messages(conversation_id, cleaned)
+        return self._json_response({"ok": True})
+
+    def _chat(self, conversation_id=None):
+        body = self._read_json()
+        messages = body.get("messages", [])
+        if not isinstance(messages, list):
+            return self._json_response({"error": "messages must be an array"}, status=400)
+
+        if not _chat_slots.acquire(blocking=False):
+            return self._json_response({"error": "too many concurrent chat requests, retry shortly"}, status=503)
+
+        try:
+            reply = llm_chat(messages)
+        except RuntimeError as err:
+            return self._json_response({"error": str(err)}, status=500)
+        finally:
+            _chat_slots.release()
+
+        return self._json_response({"reply": reply})
+
+    routes = {
+        ("GET", "conversations"): _list_conversations,
+        ("GET", "messages"): _list_messages,
+        ("POST", "conversations"): _create_conversation,
+        ("POST", "messages"): _append_message,
+        ("POST", "chat"): _chat,
+        ("PUT", "conversation"): _update_conversation,
+        ("PUT", "messages"): _replace_messages,
+    }
+
+    def _dispatch(self, method: str):
+        # API routes take no query parameters, so a plain split is enough to find the path.
+        kind, conversation_id = match_route(self.path.partition("?")[0])
+        route = self.routes.get((method, kind))
+        if route is not None:
             try:
-                conversation_id = int(path.split("/")[3])
-            except (ValueError, IndexError):
-                return self._json_response({"error": "invalid conversation id"}, status=400)
+                return route(self, conversation_id)
+            except sqlite3.Error as err:
+                return self._json_response({"error": f"database error: {err}"}, status=500)
 
-            if not get_conversation(conversation_id):
-                return self._json_response({"error": "conversation not found"}, status=404)
+        if method == "GET":
+            return self._serve_static(urlparse(self.path).path)
 
-            return self._json_response({"messages": list_messages(conversation_id)})
+        self.send_error(404, "Not found")
 
-        return self._serve_static(path)
+    def do_GET(self):
+        self._dispatch("GET")
 
     def do_POST(self):
-        parsed = urlparse(self.path)
-        path = parsed.path
+        self._dispatch("POST")
 
-        if path == "/api/conversations":
-            body = self._read_json()
-            title = body.get("title") or "New conversation"
-            system_prompt = body.get("systemPrompt") or ""
-            conversation_id = create_conversation(title=title, system_prompt=system_prompt)
-            return self._json_response({"conversation": get_conversation(conversation_id)}, status=201)
+    def do_PUT(self):
+        self._dispatch("PUT")
 
-        if path.startswith("/api/conversations/") and path.endswith("/messages"):
-            try:
-                conversation_id = int(path.split("/")[3])
-            except (ValueError, IndexError):
-                return self._json_response({"error": "invalid conversation id"}, status=400)
 
-            if not get_conversation(conversation_id):
-                return self._json_response({"error": "conversation not found"}, status=404)
+class PooledHTTPServer(ThreadingHTTPServer):
+    # Hands accepted connections to a fixed set of worker threads instead of
+    # starting a new thread per connection.
+    def __init__(self, server_address, handler_class, max_workers: int = WORKER_THREADS, reuse_port: bool = False):
+        self.reuse_port = reuse_port
+        # Created before binding: TCPServer.__init__ calls server_close() if bind fails.
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http-worker")
+        super().__init__(server_address, handler_class)
 
-            body = self._read_json()
-            role = body.get("role")
-            content = body.get("content", "")
-            if role not in {"user", "assistant", "system"}:
-                return self._json_response({"error": "invalid role"}, status=400)
+    def server_bind(self):
+        # Lets several worker processes bind the same port; the kernel balances accepts between them.
+        if self.reuse_port and hasattr(socket, "SO_REUSEPORT"):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
 
-            append_message(conversation_id, role, content)
-            return self._json_response({"ok": True}, status=201)
+    def process_request(self, request, client_address):
+        self._executor.submit(self.process_request_thread, request, client_address)
 
-        if path == "/api/chat":
-            body = self._read_json()
-            messages = body.get("messages", [])
-            if not isinstance(messages, list):
-                return self._json_response({"error": "messages must be an array"}, status=400)
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=self.block_on_close)
 
-            try:
-                reply = llm_chat(messages)
-            except RuntimeError as err:
-                return self._json_response({"error": str(err)}, status=500)
 
-            return self._json_response({"reply": reply})
+def serve(multi_process: bool = False) -> None:
+    global _batch_message_writes
+    if multi_process:
+        # A read served by another process cannot flush this process's queue, so
+        # appends are written before they are acknowledged.
+        _batch_message_writes = False
+    else:
+        start_message_writer()
 
-        self.send_error(404, "Not found")
+    server = PooledHTTPServer((HOST, PORT), Handler, reuse_port=multi_process)
 
-    def do_PUT(self):
-        parsed = urlparse(self.path)
-        path = parsed.path
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever() to return, so it cannot run on the serving thread.
+        threading.Thread(target=server.shutdown, daemon=True).start()
 
-        if path.startswith("/api/conversations/") and not path.endswith("/messages"):
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    finally:
+        # Persist queued messages before waiting on in-flight requests, then pick up
+        # anything those requests appended.
+        flush_messages()
+        server.server_close()
+        flush_messages()
+
+
+def supervise(processes: int) -> None:
+    children = []
+    for _ in range(processes):
+        pid = os.fork()
+        if pid == 0:
+            status = 1
             try:
-                conversation_id = int(path.split("/")[3])
-            except (ValueError, IndexError):
-                return self._json_response({"error": "invalid conversation id"}, status=400)
-
-            if not get_conversation(conversation_id):
-                return self._json_response({"error": "conversation not found"}, status=404)
-
-            body = self._read_json()
-            update_conversation(conversation_id, body.get("title"), body.get("systemPrompt"))
-            return self._json_response({"conversation": get_conversation(conversation_id)})
-
-        if path.startswith("/api/conversations/") and path.endswith("/messages"):
+                serve(multi_process=True)
+                status = 0
+            except KeyboardInterrupt:
+                status = 0
+            except BaseException:
+                traceback.print_exc()
+            os._exit(status)
+        children.append(pid)
+
+    def stop_children(signum=None, frame=None):
+        for pid in children:
             try:
-                conversation_id = int(path.split("/")[3])
-            except (ValueError, IndexError):
-                return self._json_response({"error": "invalid conversation id"}, status=400)
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
 
-            if not get_conversation(conversation_id):
-                return self._json_response({"error": "conversation not found"}, status=404)
+    signal.signal(signal.SIGTERM, stop_children)
+    signal.signal(signal.SIGINT, stop_children)
 
-            body = self._read_json()
-            messages = body.get("messages", [])
-            if not isinstance(messages, list):
-                return self._json_response({"error": "messages must be an array"}, status=400)
+    exit_code = 0
+    while children:
+        pid, status = os.wait()
+        if pid not in children:
+            continue
+        children.remove(pid)
+        code = os.waitstatus_to_exitcode(status)
+        if code != 0 and exit_code == 0:
+            # One failed worker takes the rest down so restart policies see the failure.
+            print(f"Worker {pid} exited with status {code}; stopping the others", file=sys.stderr)
+            exit_code = 1
+            stop_children()
 
-            cleaned = []
-            for message in messages:
-                role = message.get("role")
-                content = message.get("content", "")
-                if role not in {"user", "assistant", "system"}:
-                    return self._json_response({"error": "invalid role in messages"}, status=400)
-                cleaned.append({"role": role, "content": content})
-
-            replace_messages(conversation_id, cleaned)
-            return self._json_response({"ok": True})
-
-        self.send_error(404, "Not found")
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
     init_db()
-    server = ThreadingHTTPServer((HOST, PORT), Handler)
     print(f"Server running on http://{HOST}:{PORT}")
-    server.serve_forever()
+    processes = WORKER_PROCESSES if hasattr(os, "fork") else 1
+    if processes > 1:
+        supervise(processes)
+    else:
+        serve()